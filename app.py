@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import altair as alt
+
+from svb_core import (
+    RATE_SHOCK_GRID, WITHDRAWAL_GRID, initial_equity, portfolio_frame, precompute_grid, price_portfolio,
+    simulate_bank_run
+)
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="SVB Risk Analysis | Adam Kenny", layout="wide")
@@ -34,7 +39,7 @@ st.markdown("---")
 # --- SIDEBAR INPUTS ---
 st.sidebar.header("Scenario Settings")
 
-with st.sidebar.expander("1. Market Conditions", expanded=True):
+with st.sidebar.expander("Market Conditions", expanded=True):
     rate_shock_bps = st.slider(
         "Interest Rate Hike (bps)",
         min_value=0,
@@ -45,89 +50,103 @@ with st.sidebar.expander("1. Market Conditions", expanded=True):
     )
     st.caption(f"Simulating a market rate move of **+{rate_shock_bps/100:.2f}%**.")
 
-with st.sidebar.expander("2. Depositor Behavior", expanded=True):
-    withdrawal_pct = st.slider(
-        "Withdrawal Panic (% of Deposits)",
-        min_value=0,
-        max_value=50,
-        value=25,
-        step=1,
-        help="The percentage of total client deposits withdrawn in a short period."
-    )
-    st.caption(f"Simulating a run of **{withdrawal_pct}%** on the bank's deposits.")
-
 st.sidebar.markdown("---")
 st.sidebar.info("Model assumptions based on SVB 10-K Filings (YE 2022).")
 
 # --- BACKEND CALCULATIONS ---
+# KPI strings that only depend on the rate shock are formatted once per shock
+@st.cache_data
+def shock_kpis(rate_shock_bps: int):
+    *_, total_loss = price_portfolio(rate_shock_bps)
+    return f"+{rate_shock_bps} bps", f"${abs(total_loss):,.0f} M", f"{total_loss:,.0f} M"
 
-# 1. Bond Pricing Engine
-def get_bond_price(face, coupon, maturity, yield_rate):
-    c = face * coupon
-    cash_flows = [c] * maturity
-    cash_flows[-1] += face
-    return sum([cf / ((1 + yield_rate) ** (t + 1)) for t, cf in enumerate(cash_flows)])
-
-# 2. Portfolio Construction (Hypothetical SVB Proxy)
-portfolio_data = [
-    (5000, 0.0175, 10, 0.0175, "10Y Treasury (Safe?)"),
-    (3000, 0.0200, 30, 0.0200, "30Y Agency MBS (Long Duration)"),
-    (2000, 0.0150, 5, 0.0150, "5Y Note (Liquid)"),
-    (5000, 0.0400, 10, 0.0400, "10Y Corp Bond (Higher Yield)")
-]
-df = pd.DataFrame(portfolio_data, columns=['Face', 'Coupon', 'Maturity', 'Base_Yield', 'Asset_Name'])
+kpis = shock_kpis(rate_shock_bps)
+df = portfolio_frame(rate_shock_bps)
 
-# 3. Apply Shock
-df['Initial_Price'] = df.apply(lambda x: get_bond_price(x['Face'], x['Coupon'], x['Maturity'], x['Base_Yield']), axis=1)
-df['New_Yield'] = df['Base_Yield'] + (rate_shock_bps / 10000)
-df['Shocked_Price'] = df.apply(lambda x: get_bond_price(x['Face'], x['Coupon'], x['Maturity'], x['New_Yield']), axis=1)
-df['Loss'] = df['Shocked_Price'] - df['Initial_Price']
-df['Loss_Pct'] = (df['Loss'] / df['Initial_Price']) * 100
-
-# 4. Bank Run Logic
-total_deposits = 180000 
-initial_equity = 15000 
-cash_reserves = 15000 
-afs_assets = 25000 
+# --- FRONTEND LAYOUT ---
 
-withdrawal_amount = total_deposits * (withdrawal_pct / 100)
-remaining_withdrawal = withdrawal_amount
-current_equity = initial_equity
+# Horizontal zero line shared by the bar charts
+zero_line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(color='black', strokeWidth=0.8).encode(y='y')
 
-# Logic: Cash -> AFS -> HTM
-cash_used = min(cash_reserves, remaining_withdrawal)
-remaining_withdrawal -= cash_used
+# Loss chart only depends on the rate shock, so it is built once per shock and not inside the fragment
+@st.cache_resource
+def loss_chart(rate_shock_bps: int):
+    df = portfolio_frame(rate_shock_bps)
+    colors = np.where(df['Loss'].to_numpy() < 0, '#ff4b4b', '#00cc96')
+    loss_bars = alt.Chart(df.assign(Color=colors)).mark_bar().encode(
+        x=alt.X('Asset_Name', sort=None, title=None, axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('Loss', title="Loss ($ Millions)"),
+        color=alt.Color('Color', scale=None)
+    )
+    return loss_bars + zero_line
 
-afs_loss_realized = 0
-if remaining_withdrawal > 0:
-    afs_needed = remaining_withdrawal / 0.90 
-    if afs_needed <= afs_assets:
-        afs_loss_realized = afs_needed * 0.10
-        current_equity -= afs_loss_realized
-        remaining_withdrawal = 0
-    else:
-        afs_loss_realized = afs_assets * 0.10
-        current_equity -= afs_loss_realized
-        remaining_withdrawal -= (afs_assets * 0.90)
+# Yield curve chart is built from constants only, so it is constructed once per process
+@st.cache_resource
+def yield_curve_chart():
+    # Synthetic Yield Curve Data
+    tenors = [0.25, 0.5, 1, 2, 5, 10, 30]
+    normal_curve = [0.5, 0.7, 1.0, 1.5, 2.2, 2.8, 3.5] # Upward sloping
+    inverted_curve = [4.8, 4.9, 5.0, 4.8, 4.0, 3.8, 3.5] # Inverted (Current Scenario)
 
-htm_loss_pct = abs(df['Loss'].sum() / df['Initial_Price'].sum()) 
-htm_loss_realized = 0
+    curve_labels = ['Normal Market (2020)', 'Inverted Market (2023)']
+    curve_df = pd.DataFrame({
+        'Maturity': tenors * 2,
+        'Yield': normal_curve + inverted_curve,
+        'Market': [curve_labels[0]] * len(tenors) + [curve_labels[1]] * len(tenors)
+    })
+    curve_chart = alt.Chart(curve_df, title="Yield Curve Transformation").mark_line(point=True).encode(
+        x=alt.X('Maturity', title="Maturity (Years)"),
+        y=alt.Y('Yield', title="Yield (%)"),
+        color=alt.Color('Market', title=None, sort=curve_labels,
+                        scale=alt.Scale(domain=curve_labels, range=['#1f77b4', 'red'])),
+        strokeDash=alt.StrokeDash('Market', legend=None,
+                                  scale=alt.Scale(domain=curve_labels, range=[[5, 5], [1, 0]])),
+        strokeWidth=alt.StrokeWidth('Market', legend=None,
+                                    scale=alt.Scale(domain=curve_labels, range=[1.5, 2.5]))
+    )
+    return curve_chart
 
-if remaining_withdrawal > 0:
-    htm_face_needed = remaining_withdrawal / (1 - htm_loss_pct)
-    htm_loss_realized = htm_face_needed * htm_loss_pct
-    current_equity -= htm_loss_realized
+# Scenario heatmap reads the constant precomputed grid, so it is built once per process
+@st.cache_resource
+def scenario_heatmap():
+    _, _, equity_grid = precompute_grid()
+    grid_df = pd.DataFrame({
+        'Rate_Shock_Bps': np.repeat(RATE_SHOCK_GRID, WITHDRAWAL_GRID.size),
+        'Withdrawal_Pct': np.tile(WITHDRAWAL_GRID, RATE_SHOCK_GRID.size),
+        'Equity': equity_grid.ravel()
+    })
+    heatmap = alt.Chart(grid_df).mark_rect().encode(
+        x=alt.X('Withdrawal_Pct:O', title="Withdrawal Panic (% of Deposits)",
+                axis=alt.Axis(values=list(range(0, 51, 5)), labelAngle=0)),
+        y=alt.Y('Rate_Shock_Bps:O', title="Interest Rate Hike (bps)", sort='descending'),
+        color=alt.Color('Equity:Q', title="Equity ($ M)", scale=alt.Scale(scheme='redyellowgreen', domainMid=0)),
+        tooltip=['Rate_Shock_Bps', 'Withdrawal_Pct', alt.Tooltip('Equity', format=',.0f')]
+    )
+    return heatmap
 
-# --- FRONTEND LAYOUT ---
+# Dashboard fragment: moving the withdrawal slider reruns only this function, not the whole script.
+# Widgets inside a fragment can't live in the sidebar, so the slider sits at the top of the dashboard.
+# The loss chart is drawn in the fragment for layout, but arrives prebuilt so reruns only display it.
+@st.fragment
+def bank_run_dashboard(df, rate_shock_bps, kpis, loss_bars):
+    with st.expander("Depositor Behavior", expanded=True):
+        withdrawal_pct = st.slider(
+            "Withdrawal Panic (% of Deposits)",
+            min_value=0,
+            max_value=50,
+            value=25,
+            step=1,
+            help="The percentage of total client deposits withdrawn in a short period."
+        )
+        st.caption(f"Simulating a run of **{withdrawal_pct}%** on the bank's deposits.")
 
-# TABS for organized view
-tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "📉 Yield Curve Context", "📚 Education Mode"])
+    withdrawal_amount, afs_loss_realized, htm_loss_realized, current_equity = simulate_bank_run(rate_shock_bps, withdrawal_pct)
 
-with tab1:
     # KPI Row
+    shock_value, loss_value, loss_delta = kpis
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Market Rate Shock", f"+{rate_shock_bps} bps", help="The increase in interest rates.")
-    col2.metric("Unrealized Portfolio Loss", f"${abs(df['Loss'].sum()):,.0f} M", delta=f"{df['Loss'].sum():,.0f} M", delta_color="inverse", help="Value lost on paper due to rate hike.")
+    col1.metric("Market Rate Shock", shock_value, help="The increase in interest rates.")
+    col2.metric("Unrealized Portfolio Loss", loss_value, delta=loss_delta, delta_color="inverse", help="Value lost on paper due to rate hike.")
     col3.metric("Depositor Withdrawals", f"${withdrawal_amount:,.0f} M", help="Cash demanded by clients.")
     
     # Dynamic Equity Metric
@@ -148,16 +167,10 @@ with tab1:
     with c1:
         st.subheader("Why did the assets lose value?")
         st.caption("Bond prices move inversely to interest rates. Longer maturity = Higher Risk.")
-        fig1, ax1 = plt.subplots(figsize=(6, 4))
-        colors = ['#ff4b4b' if x < 0 else '#00cc96' for x in df['Loss']]
-        ax1.bar(df['Asset_Name'], df['Loss'], color=colors)
-        ax1.set_ylabel("Loss ($ Millions)")
-        ax1.axhline(0, color='black', linewidth=0.8)
-        plt.xticks(rotation=45, ha='right')
-        st.pyplot(fig1)
+        st.altair_chart(loss_bars, use_container_width=True)
         
         # Explainer Text
-        st.info(f"**Insight:** The '30Y MBS' lost the most value ({df.iloc[1]['Loss_Pct']:.1f}%) because it has the longest duration.")
+        st.info(f"**Insight:** The '30Y MBS' lost the most value ({df.at[1, 'Loss_Pct']:.1f}%) because it has the longest duration.")
 
     with c2:
         st.subheader("The 'Death Spiral' Waterfall")
@@ -168,14 +181,19 @@ with tab1:
             'HTM Losses': -htm_loss_realized,
             'Final Equity': current_equity
         }
-        fig2, ax2 = plt.subplots(figsize=(6, 4))
         # Color logic: Blue for start, Red for negative flows, Green/Black for final
         bar_colors = ['blue', 'orange', 'red', 'green' if current_equity > 0 else 'black']
-        ax2.bar(waterfall_data.keys(), waterfall_data.values(), color=bar_colors)
-        ax2.axhline(0, color='black', linewidth=0.8)
-        ax2.set_ylabel("Equity ($ Millions)")
-        plt.xticks(rotation=45, ha='right')
-        st.pyplot(fig2)
+        waterfall_df = pd.DataFrame({
+            'Step': list(waterfall_data.keys()),
+            'Equity': list(waterfall_data.values()),
+            'Color': bar_colors
+        })
+        waterfall_bars = alt.Chart(waterfall_df).mark_bar().encode(
+            x=alt.X('Step', sort=None, title=None, axis=alt.Axis(labelAngle=-45)),
+            y=alt.Y('Equity', title="Equity ($ Millions)"),
+            color=alt.Color('Color', scale=None)
+        )
+        st.altair_chart(waterfall_bars + zero_line, use_container_width=True)
         
         # Explainer Text
         if htm_loss_realized > 0:
@@ -183,25 +201,23 @@ with tab1:
         else:
             st.success("**Safe:** The bank met withdrawals using only Cash and AFS securities.")
 
+# TABS for organized view
+tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "📉 Yield Curve Context", "📚 Education Mode"])
+
+with tab1:
+    bank_run_dashboard(df, rate_shock_bps, kpis, loss_chart(rate_shock_bps))
+
+    # Scenario Map (precomputed once for every slider combination)
+    st.subheader("Scenario Map: Where does the bank fail?")
+    st.caption("Final equity for every combination of rate hike and deposit run. Red cells are insolvent.")
+    st.altair_chart(scenario_heatmap(), use_container_width=True)
+
 with tab2:
     # --- EXISTING CODE STARTS HERE (KEEP THIS) ---
     st.header("The Macro View: Yield Curve Inversion")
     st.markdown("Before the collapse, the Yield Curve 'inverted' (Short-term rates > Long-term rates). This is a classic recession signal.")
     
-    # Synthetic Yield Curve Data
-    tenors = [0.25, 0.5, 1, 2, 5, 10, 30]
-    normal_curve = [0.5, 0.7, 1.0, 1.5, 2.2, 2.8, 3.5] # Upward sloping
-    inverted_curve = [4.8, 4.9, 5.0, 4.8, 4.0, 3.8, 3.5] # Inverted (Current Scenario)
-    
-    fig3, ax3 = plt.subplots(figsize=(10, 5))
-    ax3.plot(tenors, normal_curve, marker='o', label='Normal Market (2020)', linestyle='--')
-    ax3.plot(tenors, inverted_curve, marker='o', label='Inverted Market (2023)', color='red', linewidth=2)
-    ax3.set_xlabel("Maturity (Years)")
-    ax3.set_ylabel("Yield (%)")
-    ax3.set_title("Yield Curve Transformation")
-    ax3.legend()
-    ax3.grid(True, alpha=0.3)
-    st.pyplot(fig3)
+    st.altair_chart(yield_curve_chart(), use_container_width=True)
     
     st.markdown("""
     **What does this tell us?**
@@ -246,8 +262,11 @@ with tab3:
     """)
 
 # --- FOOTER ---
-with st.expander("Show Underlying Data Model"):
-    st.dataframe(df.style.format({
+# Display copy with pre-formatted string columns, built once per rate shock instead of a Styler per rerun
+@st.cache_data
+def data_model_table(rate_shock_bps: int) -> pd.DataFrame:
+    df = portfolio_frame(rate_shock_bps)
+    formats = {
         'Face': "{:,.0f}",
         'Coupon': "{:.2%}",
         'Maturity': "{:.0f}",
@@ -257,6 +276,10 @@ with st.expander("Show Underlying Data Model"):
         'Shocked_Price': "{:,.2f}",
         'Loss': "{:,.2f}",
         'Loss_Pct': "{:.2f}%"
-    }))
+    }
+    return df.assign(**{col: df[col].map(fmt.format) for col, fmt in formats.items()})
+
+with st.expander("Show Underlying Data Model"):
+    st.dataframe(data_model_table(rate_shock_bps))
 
 
@@ -0,0 +1,29 @@
+# Ahead-of-time build of the svb_jit pricing kernels. Run once at install time:
+#     python build_ext.py
+# This writes the svb_kernels extension module next to this file. svb_core imports it when present,
+# so a cold start skips the numba JIT compile; without it svb_core falls back to the JIT kernels.
+#
+# Rebuild after ANY edit to svb_jit. svb_core imports whatever svb_kernels is on disk, so a stale
+# build silently runs the old math (or falls back to JIT if an export is missing).
+#
+# numba.pycc is pending deprecation (numba 0.68 warns on import) and this script will stop working
+# once numba removes it. The app itself keeps running on the JIT fallback.
+from numba.pycc import CC
+
+import svb_jit
+
+cc = CC('svb_kernels')
+
+# Export the svb_jit sources directly, so a rebuild always picks up the current JIT kernels
+cc.export('price_all', 'f8[:](f8[:], f8[:], i8[:], f8[:])')(svb_jit.price_all.py_func)
+cc.export(
+    'simulate',
+    'Tuple((f8[:], f8[:], f8, f8, f8))(f8, f8, f8[:], f8[:], i8[:], f8[:], f8, f8, f8, f8)'
+)(svb_jit.simulate.py_func)
+cc.export(
+    'simulate_grid',
+    'UniTuple(f8[:, :], 3)(i8[:], i8[:], f8[:], f8[:], i8[:], f8[:], f8, f8, f8, f8)'
+)(svb_jit.simulate_grid.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -0,0 +1,92 @@
+# Shared pricing and bank-run model for the SVB dashboard.
+# Module-level state is built once per process on import, not on every Streamlit rerun.
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+# 1. Portfolio Construction (Hypothetical SVB Proxy)
+portfolio_data = [
+    (5000, 0.0175, 10, 0.0175, "10Y Treasury (Safe?)"),
+    (3000, 0.0200, 30, 0.0200, "30Y Agency MBS (Long Duration)"),
+    (2000, 0.0150, 5, 0.0150, "5Y Note (Liquid)"),
+    (5000, 0.0400, 10, 0.0400, "10Y Corp Bond (Higher Yield)")
+]
+
+# All model math runs on plain NumPy arrays; pandas is only used to build display tables
+_FACE = np.array([row[0] for row in portfolio_data], dtype=np.float64)
+_COUPON = np.array([row[1] for row in portfolio_data], dtype=np.float64)
+_MAT = np.array([row[2] for row in portfolio_data], dtype=np.int64)
+_Y0 = np.array([row[3] for row in portfolio_data], dtype=np.float64)
+_NAMES = [row[4] for row in portfolio_data]
+
+# 2. Bond Pricing Engine (closed-form annuity, see svb_jit.annuity_price)
+try:
+    # Ahead-of-time compiled by build_ext.py, so a cold start pays no JIT compile
+    from svb_kernels import price_all, simulate, simulate_grid
+except ImportError:
+    # JIT fallback; kernels compile lazily on first call and cache=True keeps them on disk
+    from svb_jit import price_all, simulate, simulate_grid
+
+# Balance sheet assumptions ($ Millions)
+total_deposits = 180000 
+initial_equity = 15000 
+cash_reserves = 15000 
+afs_assets = 25000 
+_BALANCE_SHEET = (float(total_deposits), float(initial_equity), float(cash_reserves), float(afs_assets))
+
+# Scenario grid covered by the rate-shock and withdrawal sliders
+RATE_SHOCK_STEP = 25
+# int64 explicitly: the AOT simulate_grid signature takes i8[:], and the default int is int32 on some platforms
+RATE_SHOCK_GRID = np.arange(0, 501, RATE_SHOCK_STEP, dtype=np.int64)
+WITHDRAWAL_GRID = np.arange(0, 51, dtype=np.int64)
+
+# 3. Apply Shock
+@st.cache_data
+def price_portfolio(rate_shock_bps: int):
+    # Same annuity_price kernel that simulate uses for the bank run, without the balance sheet
+    new_yield = _Y0 + (rate_shock_bps / 10000)
+    initial_price = price_all(_FACE, _COUPON, _MAT, _Y0)
+    shocked_price = price_all(_FACE, _COUPON, _MAT, new_yield)
+    loss = shocked_price - initial_price
+    loss_pct = (loss / initial_price) * 100
+    return new_yield, initial_price, shocked_price, loss, loss_pct, float(loss.sum())
+
+# Display-only table for the charts and the data model expander
+@st.cache_data
+def portfolio_frame(rate_shock_bps: int) -> pd.DataFrame:
+    new_yield, initial_price, shocked_price, loss, loss_pct, _ = price_portfolio(rate_shock_bps)
+    return pd.DataFrame({
+        'Face': _FACE,
+        'Coupon': _COUPON,
+        'Maturity': _MAT,
+        'Base_Yield': _Y0,
+        'Asset_Name': _NAMES,
+        'Initial_Price': initial_price,
+        'New_Yield': new_yield,
+        'Shocked_Price': shocked_price,
+        'Loss': loss,
+        'Loss_Pct': loss_pct
+    })
+
+# 4. Scenario Sweep: the full (rate shock x withdrawal) surface, computed once by svb_jit.simulate_grid
+@st.cache_data
+def precompute_grid():
+    return simulate_grid(RATE_SHOCK_GRID, WITHDRAWAL_GRID, _FACE, _COUPON, _MAT, _Y0, *_BALANCE_SHEET)
+
+# 5. Bank Run Logic (svb_jit.simulate)
+def simulate_bank_run(rate_shock_bps: int, withdrawal_pct: int):
+    withdrawal_amount = total_deposits * (withdrawal_pct / 100)
+
+    # Slider values land on the precomputed grid, so they are an O(1) lookup
+    i, off_grid = divmod(rate_shock_bps, RATE_SHOCK_STEP)
+    j = withdrawal_pct
+    if not off_grid and 0 <= i < RATE_SHOCK_GRID.size and 0 <= j < WITHDRAWAL_GRID.size:
+        afs_grid, htm_grid, equity_grid = precompute_grid()
+        return withdrawal_amount, afs_grid[i, j], htm_grid[i, j], equity_grid[i, j]
+
+    # Not reachable from the UI (both sliders step onto the grid); kept for scripts and notebooks
+    # that ask for off-grid scenarios
+    _, _, afs_loss_realized, htm_loss_realized, current_equity = simulate(
+        float(rate_shock_bps), float(withdrawal_pct), _FACE, _COUPON, _MAT, _Y0, *_BALANCE_SHEET
+    )
+    return withdrawal_amount, afs_loss_realized, htm_loss_realized, current_equity
@@ -0,0 +1,59 @@
+# Numba kernels shared by svb_core (JIT) and build_ext.py (AOT into svb_kernels).
+# Keep this module free of Streamlit/pandas imports so build_ext.py can compile it standalone.
+import numpy as np
+from numba import njit
+
+# Closed-form annuity price: P = C*(1-(1+y)^-n)/y + F*(1+y)^-n
+@njit(cache=True)
+def annuity_price(face, coupon, maturity, y):
+    disc = (1 + y) ** (-maturity)
+    return face * coupon * (1 - disc) / y + face * disc
+
+@njit(cache=True)
+def price_all(face, coupon, maturity, y):
+    out = np.empty(face.size)
+    for i in range(face.size):
+        out[i] = annuity_price(face[i], coupon[i], maturity[i], y[i])
+    return out
+
+# One native call runs the whole scenario: bond pricing, loss aggregation and the bank run
+@njit(cache=True)
+def simulate(rate_shock_bps, withdrawal_pct, face, coupon, maturity, y0,
+             total_deposits, initial_equity, cash_reserves, afs_assets):
+    initial_prices = np.empty(face.size)
+    shocked_prices = np.empty(face.size)
+    for i in range(face.size):
+        initial_prices[i] = annuity_price(face[i], coupon[i], maturity[i], y0[i])
+        shocked_prices[i] = annuity_price(face[i], coupon[i], maturity[i], y0[i] + rate_shock_bps / 10000)
+    total_init = initial_prices.sum()
+    htm_loss_pct = abs((shocked_prices.sum() - total_init) / total_init)
+
+    # Logic: Cash -> AFS -> HTM
+    withdrawal_amount = total_deposits * (withdrawal_pct / 100)
+    after_cash = withdrawal_amount - min(cash_reserves, withdrawal_amount)
+
+    # AFS securities are sold at a 10% haircut
+    afs_loss_realized = min(afs_assets, after_cash / 0.90) * 0.10
+    after_afs = max(after_cash - afs_assets * 0.90, 0.0)
+
+    # Whatever is left is raised by selling HTM bonds at their shocked price
+    htm_face_needed = after_afs / (1 - htm_loss_pct)
+    htm_loss_realized = htm_face_needed * htm_loss_pct
+
+    current_equity = initial_equity - afs_loss_realized - htm_loss_realized
+    return initial_prices, shocked_prices, afs_loss_realized, htm_loss_realized, current_equity
+
+@njit(cache=True)
+def simulate_grid(rate_shocks, withdrawal_pcts, face, coupon, maturity, y0,
+                  total_deposits, initial_equity, cash_reserves, afs_assets):
+    afs_loss = np.empty((rate_shocks.size, withdrawal_pcts.size))
+    htm_loss = np.empty_like(afs_loss)
+    equity = np.empty_like(afs_loss)
+    for i in range(rate_shocks.size):
+        for j in range(withdrawal_pcts.size):
+            _, _, afs, htm, eq = simulate(float(rate_shocks[i]), float(withdrawal_pcts[j]), face, coupon, maturity, y0,
+                                          total_deposits, initial_equity, cash_reserves, afs_assets)
+            afs_loss[i, j] = afs
+            htm_loss[i, j] = htm
+            equity[i, j] = eq
+    return afs_loss, htm_loss, equity